@@ -1,16 +1,39 @@
 import json
 import os
+import re
 import sys
 import json
-from time import sleep
+import atexit
+import gc
+import heapq
+import shlex
+import shutil
+import subprocess
+import zlib
+import socket
+import socketserver
+import tempfile
+import threading
+import argparse
+import getpass
+import queue
+from collections import OrderedDict, deque
+from time import sleep, perf_counter
 from typing import Union
+from urllib.parse import urlparse
 
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from PyQt6.QtWidgets import *
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from git import Repo, Head, RemoteProgress, GitCommandError, UpdateProgress
+from git import Repo, Head, RemoteProgress, GitCommandError, UpdateProgress, SymbolicReference
+
+
+# XDG_RUNTIME_DIR is private to the user, else the daemon creates a 0700 directory
+SOCKET_PATH = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or
+                           os.path.join(tempfile.gettempdir(), f'git-gui-{getpass.getuser()}'),
+                           'git-gui.sock')
 
 
 stylesheet = """
@@ -62,20 +85,301 @@ QTreeView::branch:open:has-children:has-siblings {
 """
 
 class Cache():
-    def __init__(self) -> None:
-        pass
+    """Least recently used cache, safe to use from worker threads"""
+    def __init__(self, max_size: int = 100) -> None:
+        self._max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+
+class CommitTimeline():
+    """Commits of several repositories merged by commit date.
+    Each repository is read BATCH_SIZE commits at a time and merged with a heap,
+    so only one batch per repository is held besides the pages already read.
+    Pages are never changed once merged and may be shared by several views."""
+    BATCH_SIZE = 50
+    PAGE_SIZE = 100
+
+    def __init__(self, repos: dict, since: datetime, tips: tuple) -> None:
+        """tips are (name, HEAD sha) as in key, commits are read from these
+        so moving HEAD does not shift pages"""
+        self._repos = repos
+        self._since = since
+        self._tips = dict(tips)
+        self._offsets = {name: 0 for name in repos}
+        self._buffers = {name: [] for name in repos}
+        self._exhausted = set()
+        self._heap = []
+        self._primed = False
+        self._lock = threading.Lock()
+        self.pages = []
+
+    @staticmethod
+    def key(repos: dict, since: datetime) -> tuple:
+        """Cache key, changes when any ref tip moves"""
+        tips = []
+        for name, repo in sorted(repos.items()):
+            try:
+                tips.append((name, repo.head.commit.hexsha))
+            except ValueError:
+                # No commits yet
+                tips.append((name, None))
+        return since.isoformat(), tuple(tips)
+
+    @property
+    def at_end(self) -> bool:
+        return self._primed and not self._heap
+
+    def _read_batch(self, name: str):
+        """Read next batch of commits of one repository, newest first"""
+        if self._tips.get(name) is None:
+            self._buffers[name] = []
+            self._exhausted.add(name)
+            return
+        try:
+            output = self._repos[name].git.log('--date-order', f'--since={self._since.isoformat()}',
+                                               f'--skip={self._offsets[name]}', f'--max-count={self.BATCH_SIZE}',
+                                               '--format=%ct%x00%H%x00%an%x00%s', self._tips[name])
+        except GitCommandError as ex:
+            print(f"{name}: {ex}")
+            output = ""
+        batch = []
+        for line in output.splitlines():
+            date, sha, author, summary = line.split('\x00', 3)
+            batch.append((int(date), name, sha, author, summary))
+        self._offsets[name] += len(batch)
+        if len(batch) < self.BATCH_SIZE:
+            self._exhausted.add(name)
+        self._buffers[name] = batch
+
+    def _prime(self):
+        """Read the first batch of all repositories in parallel"""
+        pool = QThreadPool()
+        for name in self._repos:
+            pool.start(Worker(self._read_batch, name))
+        pool.waitForDone()
+        for name, batch in self._buffers.items():
+            if batch:
+                heapq.heappush(self._heap, (-batch[0][0], name, 0))
+        self._primed = True
+
+    def page(self, index: int) -> list:
+        """Page number index, merged when no view has read it yet.
+        Rows are (date, repository, sha, author, summary). Empty past the last page."""
+        with self._lock:
+            while len(self.pages) <= index and not self.at_end:
+                self._next_page(self.PAGE_SIZE)
+            return self.pages[index] if index < len(self.pages) else []
+
+    def _next_page(self, size: int):
+        """Merge the next size commits"""
+        if not self._primed:
+            self._prime()
+        page = []
+        while self._heap and len(page) < size:
+            _, name, index = heapq.heappop(self._heap)
+            batch = self._buffers[name]
+            page.append(batch[index])
+            index += 1
+            if index == len(batch) and name not in self._exhausted:
+                self._read_batch(name)
+                batch = self._buffers[name]
+                index = 0
+            if index < len(batch):
+                heapq.heappush(self._heap, (-batch[index][0], name, index))
+        if page:
+            self.pages.append(page)
+
+
+class DiffLoader():
+    """Reads diffs of changed files, truncated and cached.
+    Cached diffs are keyed by HEAD, index blob and worktree stat of the file."""
+    MAX_DIFF_BYTES = 256 * 1024
+    BINARY_CHECK_BYTES = 8000
+
+    def __init__(self, cache_size: int = 200) -> None:
+        self.cache = Cache(cache_size)
+
+    def _key(self, repo: Repo, path: str) -> tuple:
+        try:
+            head = repo.head.commit.hexsha
+        except ValueError:
+            # No commits yet
+            head = None
+        index_entry = repo.git.ls_files('-s', '--', path)
+        blob = index_entry.split(' ')[1] if index_entry else None
+        try:
+            stat = os.stat(os.path.join(repo.working_dir, path))
+            worktree = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            # Deleted in worktree
+            worktree = None
+        return repo.working_dir, path, head, blob, worktree
+
+    def _truncate(self, data: bytes, path: str) -> str:
+        text = data[:self.MAX_DIFF_BYTES].decode('utf-8', errors='replace')
+        if len(data) > self.MAX_DIFF_BYTES:
+            text += f"\n\n... {path} truncated at {self.MAX_DIFF_BYTES // 1024} KiB"
+        return text
+
+    def _read(self, repo: Repo, code: str, path: str) -> str:
+        full_path = os.path.join(repo.working_dir, path)
+        if code == '??':
+            if os.path.isdir(full_path):
+                return f"Untracked directory {path}"
+            with open(full_path, 'rb') as f:
+                data = f.read(self.MAX_DIFF_BYTES + 1)
+            if b'\0' in data[:self.BINARY_CHECK_BYTES]:
+                return f"Untracked binary file {path}"
+            return f"Untracked file {path}\n\n" + self._truncate(data, path)
+
+        against = ['HEAD'] if repo.head.is_valid() else ['--cached']
+        process = repo.git.diff(*against, '--', path, as_process=True)
+        try:
+            # Only read what is shown, large diffs are never read in full
+            data = process.stdout.read(self.MAX_DIFF_BYTES + 1)
+        finally:
+            process.proc.kill()
+            process.proc.wait()
+        return self._truncate(data, path) or f"No diff for {path}"
+
+    def load(self, repo: Repo, code: str, path: str) -> str:
+        key = self._key(repo, path)
+        text = self.cache.get(key)
+        if text is None:
+            text = self._read(repo, code, path)
+            self.cache.put(key, text)
+        return text
+
+
+class StatusPolicy():
+    """How much work a dirty check is allowed to do on a repository"""
+    SUBMODULE_MODES = ['none', 'untracked', 'dirty', 'all']
+
+    def __init__(self, untracked: bool = False, index_only: bool = False, submodules: str = 'none') -> None:
+        self.untracked = untracked
+        self.index_only = index_only
+        self.submodules = submodules if submodules in self.SUBMODULE_MODES else 'none'
+
+    @staticmethod
+    def from_json(data: dict | None) -> 'StatusPolicy':
+        data = data or {}
+        return StatusPolicy(data.get('untracked', False),
+                            data.get('index_only', False),
+                            data.get('submodules', 'none'))
+
+    def to_json(self) -> dict:
+        return {'untracked': self.untracked, 'index_only': self.index_only, 'submodules': self.submodules}
+
+    def describe(self) -> str:
+        scope = "index only" if self.index_only else "index and worktree"
+        untracked = "untracked files" if self.untracked else "no untracked files"
+        return f"{scope}, {untracked}, ignore submodules: {self.submodules}"
+
+    def cheaper(self) -> Union['StatusPolicy', None]:
+        """Return the next cheaper policy, None if this is the cheapest"""
+        if self.untracked and not self.index_only:
+            return StatusPolicy(False, self.index_only, self.submodules)
+        if self.submodules != 'all':
+            return StatusPolicy(self.untracked, self.index_only, 'all')
+        if not self.index_only:
+            return StatusPolicy(self.untracked, True, self.submodules)
+        return None
+
+    def read(self, repo: Repo) -> dict:
+        """Read status record of repo.
+        Changes are (status code, path) as given by git status --porcelain -z"""
+        start = perf_counter()
+        changes = []
+        if self.index_only:
+            output = repo.git.diff('--cached', '--name-status', '-z', f'--ignore-submodules={self.submodules}')
+            fields = iter(output.split('\0'))
+            for code in fields:
+                if not code:
+                    continue
+                path = next(fields)
+                if code[0] in 'RC':
+                    # Renames and copies list source and then new path
+                    path = next(fields)
+                changes.append((code[:1] + ' ', path))
+        else:
+            untracked = 'normal' if self.untracked else 'no'
+            output = repo.git.status('--porcelain', '-z', f'--untracked-files={untracked}',
+                                     f'--ignore-submodules={self.submodules}')
+            entries = iter(output.split('\0'))
+            for entry in entries:
+                if not entry:
+                    continue
+                if entry[0] in 'RC':
+                    # Source of rename or copy follows as its own field
+                    next(entries)
+                changes.append((entry[:2], entry[3:]))
+        try:
+            behind = int(repo.git.rev_list('--count', 'HEAD..@{upstream}'))
+        except GitCommandError:
+            # No upstream configured
+            behind = 0
+        branch = None if repo.head.is_detached else repo.active_branch.name
+        return {'dirty': len(changes) > 0, 'changes': changes, 'behind': behind, 'branch': branch,
+                'default_branch': self.default_branch(repo), 'cost': perf_counter() - start}
+
+    @staticmethod
+    def default_branch(repo: Repo) -> str:
+        """Branch origin/HEAD points at, else main or master. Read from refs, no git process."""
+        try:
+            return SymbolicReference(repo, 'refs/remotes/origin/HEAD').reference.remote_head
+        except (ValueError, TypeError):
+            heads = [head.name for head in repo.heads]
+            return 'main' if 'main' in heads or 'master' not in heads else 'master'
 
 
 class GroupItem(QStandardItem):
+    ROLLUP_LABELS = ['dirty', 'behind', 'erroring', 'off default branch']
+
     def __init__(self, text: str):
         super().__init__(text)
+        self._rollup = [0] * len(self.ROLLUP_LABELS)
+        self.rollup_item = QStandardItem()
+
+    @property
+    def items(self) -> list:
+        return [self, self.rollup_item]
+
+    @property
+    def rollup(self) -> dict:
+        return dict(zip(self.ROLLUP_LABELS, self._rollup))
+
+    def update_rollup(self, old: tuple, new: tuple):
+        """Move one member from old to new rollup flags"""
+        for i in range(len(self._rollup)):
+            self._rollup[i] += int(new[i]) - int(old[i])
+        parts = [f"{count} {label}" for label, count in self.rollup.items() if count > 0]
+        self.rollup_item.setText(", ".join(parts))
 
     def __hash__(self) -> int:
         return hash(self.text())
 
 
 class RepoItem(QStandardItem):
-    def __init__(self, text: str, repo: Repo, icon: QIcon = None, update_icon: QIcon = None):
+    def __init__(self, text: str, repo: Repo, icon: QIcon = None, update_icon: QIcon = None,
+                 policy: StatusPolicy = None):
         super().__init__(text)
         self.setData(repo, Qt.ItemDataRole.UserRole)
         self.path_item = QStandardItem(repo.working_dir)
@@ -88,6 +392,9 @@ class RepoItem(QStandardItem):
         self._blink_left = 0
         self._in_blink = False
         self._error_msg = None
+        self._policy = policy or StatusPolicy()
+        self._status = {'dirty': False, 'changes': [], 'behind': 0, 'branch': None, 'cost': 0.0}
+        self._rollup_flags = (False, False, False, False)
 
     @property
     def items(self) -> list:
@@ -105,6 +412,64 @@ class RepoItem(QStandardItem):
     @property
     def error_msg(self) -> str:
         return self._error_msg
+
+    @error_msg.setter
+    def error_msg(self, error_msg: Union[str, None]):
+        self._error_msg = error_msg
+
+    @property
+    def policy(self) -> StatusPolicy:
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy: StatusPolicy):
+        self._policy = policy
+
+    def update_rollup(self):
+        """Report changed rollup flags to the group this item is shown in"""
+        default_branch = self._status.get('default_branch')
+        flags = (self._status['dirty'],
+                 self._status['behind'] > 0,
+                 self._error_msg is not None or 'error' in self._status,
+                 default_branch is not None and self.branch_name.text() != default_branch)
+        if flags == self._rollup_flags:
+            return
+        parent = self.parent()
+        if type(parent) is GroupItem:
+            parent.update_rollup(self._rollup_flags, flags)
+        self._rollup_flags = flags
+
+    @property
+    def status(self) -> dict:
+        """Last status record"""
+        return self._status
+
+    @property
+    def changes(self) -> list:
+        """(status code, path) of changed files from the last status read"""
+        return list(self._status['changes'])
+
+    @property
+    def status_cost(self) -> float:
+        """Seconds spent on the last status read"""
+        return self._status['cost']
+
+    def git_status_cache(self) -> tuple:
+        """Return (core.untrackedCache, core.fsmonitor) as set in repo config"""
+        reader = self.repo.config_reader()
+        untracked_cache = str(reader.get_value('core', 'untrackedCache', 'false')).lower() == 'true'
+        fsmonitor = str(reader.get_value('core', 'fsmonitor', 'false')).lower() == 'true'
+        return untracked_cache, fsmonitor
+
+    def set_git_status_cache(self, untracked_cache: Union[bool, None], fsmonitor: Union[bool, None]):
+        """Toggle git's own status accelerators, None leaves a setting as it is.
+        Only changed values are written."""
+        current = self.git_status_cache()
+        with self.repo.config_writer() as writer:
+            if untracked_cache is not None and current[0] != untracked_cache:
+                writer.set_value('core', 'untrackedCache', str(untracked_cache).lower())
+            if fsmonitor is not None and current[1] != fsmonitor:
+                writer.set_value('core', 'fsmonitor', str(fsmonitor).lower())
     
     def create_branch(self, branch: str) -> Head:
         """Create branch. Validate if already exists"""
@@ -139,12 +504,27 @@ class RepoItem(QStandardItem):
                 self.branch_name.setText(self.repo.active_branch.name)
             except GitCommandError as ex:
                 QMessageBox.information(None, f"Git Error: {self.text()}", ex.stderr)
+            self.update_rollup()
             return self.repo.head
         else:
             return None
         
     def update_dirty_status(self):
-        if self.repo.is_dirty():
+        try:
+            self.apply_status(self._policy.read(self.repo))
+        except GitCommandError as ex:
+            print(f"{self.text()}: {ex}")
+            self.apply_status(dict(self._status, error=f"{ex}"))
+
+    def apply_status(self, record: dict):
+        """Show status record, read here or received from the status daemon"""
+        self._status = dict(record, changes=[tuple(change) for change in record['changes']])
+        if 'error' in record:
+            self.update_rollup()
+            return
+        self.branch_name.setText(self._status['branch'] or "<detached>")
+        self.update_rollup()
+        if self._status['dirty']:
             self.setForeground(QColorConstants.DarkYellow)
             self.setIcon(self._icon)
             self.setToolTip("Dirty!")
@@ -153,16 +533,38 @@ class RepoItem(QStandardItem):
             self.setToolTip("")
 
         
-    def pull(self) -> None:
-        """Do pull on repo. Return if updated."""
+    @property
+    def remote_url(self) -> Union[str, None]:
+        if 'origin' not in self.repo.remotes:
+            return None
+        return self.repo.remotes.origin.url
+
+    def fetch(self, env: dict = None) -> float:
+        """Do fetch on repo. Return seconds spent."""
+        self._error_msg = None
+        start = perf_counter()
+        repo: Repo = self.repo
+        if 'origin' in repo.remotes:
+            try:
+                with repo.git.custom_environment(**(env or {})):
+                    repo.remotes.origin.fetch()
+            except GitCommandError as ex:
+                self._error_msg = f"Git Error: {self.text()}: {ex}"
+                print(f"{ex}")
+        return perf_counter() - start
+
+    def pull(self, env: dict = None) -> float:
+        """Do pull on repo. Return seconds spent."""
         self._error_msg = None
+        start = perf_counter()
         self.setBackground(QColorConstants.DarkYellow)
         repo: Repo = self.repo
         if 'origin' in repo.remotes:
             try:
                 # last_commit = repo.active_branch.commit
                 if not self.repo.is_dirty():
-                    repo.remotes.origin.pull()
+                    with repo.git.custom_environment(**(env or {})):
+                        repo.remotes.origin.pull()
                 # if last_commit != repo.active_branch.commit:
                 #     return True
             except GitCommandError as ex:
@@ -171,7 +573,7 @@ class RepoItem(QStandardItem):
                 # QMessageBox.information(None, f"Git Error: {self.text()}", f"{ex}")
             finally:
                 self.setBackground(QColorConstants.White)
-        # return False
+        return perf_counter() - start
 
     def blink(self, times: int = 0) -> int:
         """Blink number of times. Return times left."""
@@ -181,7 +583,7 @@ class RepoItem(QStandardItem):
             self.setIcon(self._update_icon)
         else:
             self._blink_left -= 1
-            if self.repo.is_dirty():
+            if self._status['dirty']:
                 self.setIcon(self._icon)
             else:
                 self.setIcon(QIcon())
@@ -263,6 +665,235 @@ class SelectBranchDialog(QDialog):
         self.buttonBox.rejected.connect(self.reject)
         self.layout.addWidget(self.buttonBox)
 
+class StatusPolicyDialog(QDialog):
+
+    def __init__(self, parent: QWidget | None, policy: StatusPolicy, git_caches: list) -> None:
+
+        super().__init__(parent)
+        self.setWindowTitle("Status policy")
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.untracked = QCheckBox("Scan untracked files")
+        self.untracked.setChecked(policy.untracked)
+        self.index_only = QCheckBox("Index only (skip worktree)")
+        self.index_only.setChecked(policy.index_only)
+        self.submodules = QComboBox()
+        self.submodules.addItems(StatusPolicy.SUBMODULE_MODES)
+        self.submodules.setCurrentText(policy.submodules)
+        # Partially checked when the repos disagree, then left as they are unless changed
+        self.untracked_cache = QCheckBox("core.untrackedCache")
+        self.fsmonitor = QCheckBox("core.fsmonitor")
+        self._initial_states = []
+        for index, box in enumerate([self.untracked_cache, self.fsmonitor]):
+            values = set(git_cache[index] for git_cache in git_caches)
+            if len(values) == 1:
+                box.setChecked(values.pop())
+            else:
+                box.setTristate(True)
+                box.setCheckState(Qt.CheckState.PartiallyChecked)
+            self._initial_states.append(box.checkState())
+
+        form_layout = QFormLayout()
+        form_layout.addRow("Ignore submodules:", self.submodules)
+        self.layout.addWidget(self.untracked)
+        self.layout.addWidget(self.index_only)
+        self.layout.addLayout(form_layout)
+        self.layout.addWidget(QLabel("Git config: "))
+        self.layout.addWidget(self.untracked_cache)
+        self.layout.addWidget(self.fsmonitor)
+
+        QBtn = QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttonBox)
+
+    @property
+    def policy(self) -> StatusPolicy:
+        return StatusPolicy(self.untracked.isChecked(), self.index_only.isChecked(), self.submodules.currentText())
+
+    @property
+    def git_cache(self) -> tuple:
+        """(core.untrackedCache, core.fsmonitor) to write, None for settings not changed by the user"""
+        values = []
+        for box, initial_state in zip([self.untracked_cache, self.fsmonitor], self._initial_states):
+            state = box.checkState()
+            if state == initial_state or state == Qt.CheckState.PartiallyChecked:
+                values.append(None)
+            else:
+                values.append(state == Qt.CheckState.Checked)
+        return tuple(values)
+
+class TimelineModel(QAbstractTableModel):
+    HEADERS = ["Date", "Repository", "Author", "Summary", "Commit"]
+    page_ready = pyqtSignal(list)
+
+    def __init__(self, timeline: CommitTimeline, thread_pool: QThreadPool, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._timeline = timeline
+        self._thread_pool = thread_pool
+        self._rows = []
+        self._page_index = 0
+        self._fetching = False
+        self.page_ready.connect(self.add_page)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        date, name, sha, author, summary = self._rows[index.row()]
+        return [datetime.fromtimestamp(date).strftime('%Y-%m-%d %H:%M'), name, author, summary, sha[:10]][index.column()]
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if parent.isValid() or self._fetching:
+            return False
+        return self._page_index < len(self._timeline.pages) or not self._timeline.at_end
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        self._fetching = True
+        self._thread_pool.start(Worker(self._fetch_page))
+
+    def _fetch_page(self):
+        page = self._timeline.page(self._page_index)
+        try:
+            self.page_ready.emit(page)
+        except RuntimeError:
+            # Dialog closed while reading
+            pass
+
+    @pyqtSlot(list)
+    def add_page(self, page: list):
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+            self._page_index += 1
+        self._fetching = False
+
+
+class TimelineDialog(QDialog):
+
+    def __init__(self, parent: QWidget | None, title: str, model: TimelineModel) -> None:
+
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.resize(900, 600)
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.model = model
+        model.setParent(self)
+        self.table = QTableView()
+        self.table.setModel(model)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(False)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.layout.addWidget(self.table)
+
+class ChangesDialog(QDialog):
+    diff_loaded = pyqtSignal(str, str)
+    untracked_loaded = pyqtSignal(list)
+
+    def __init__(self, parent: QWidget | None, item: RepoItem, loader: DiffLoader, thread_pool: QThreadPool) -> None:
+
+        super().__init__(parent)
+        self.setWindowTitle(f"Changes: {item.text()}")
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.resize(1000, 600)
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+        self._repo = item.repo
+        self._loader = loader
+        self._thread_pool = thread_pool
+
+        self.policy_label = QLabel()
+        self.layout.addWidget(self.policy_label)
+        self.file_list = QListWidget()
+        self.add_changes(item.changes)
+        self.diff_view = QPlainTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.diff_view.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+
+        splitter = QSplitter()
+        splitter.addWidget(self.file_list)
+        splitter.addWidget(self.diff_view)
+        splitter.setSizes([300, 700])
+        self.layout.addWidget(splitter)
+
+        self.diff_loaded.connect(self.show_diff)
+        self.untracked_loaded.connect(self.add_untracked)
+        self.file_list.currentItemChanged.connect(self.load_diff)
+
+        if item.policy.index_only:
+            self.policy_label.setText("Status policy is index only: unstaged and untracked files are not listed")
+        elif not item.policy.untracked:
+            # Status was read without untracked files, list them now
+            self.policy_label.setText("Reading untracked files...")
+            self._thread_pool.start(Worker(self._load_untracked_worker))
+        else:
+            self.policy_label.hide()
+
+    def add_changes(self, changes: list):
+        for code, path in changes:
+            list_item = QListWidgetItem(f"{code} {path}")
+            list_item.setData(Qt.ItemDataRole.UserRole, (code, path))
+            self.file_list.addItem(list_item)
+
+    def _load_untracked_worker(self):
+        try:
+            output = self._repo.git.ls_files('--others', '--exclude-standard', '--directory', '-z')
+            changes = [('??', path) for path in output.split('\0') if path]
+        except GitCommandError as ex:
+            print(f"{ex}")
+            changes = []
+        try:
+            self.untracked_loaded.emit(changes)
+        except RuntimeError:
+            # Dialog closed while loading
+            pass
+
+    @pyqtSlot(list)
+    def add_untracked(self, changes: list):
+        self.add_changes(changes)
+        self.policy_label.setText(f"{len(changes)} untracked files, not part of the status policy")
+
+    def load_diff(self, current: QListWidgetItem, previous: QListWidgetItem):
+        if current is None:
+            return
+        code, path = current.data(Qt.ItemDataRole.UserRole)
+        self.diff_view.setPlainText("Loading...")
+        self._thread_pool.start(Worker(self._load_diff_worker, code, path))
+
+    def _load_diff_worker(self, code: str, path: str):
+        try:
+            text = self._loader.load(self._repo, code, path)
+        except (GitCommandError, OSError) as ex:
+            text = f"{ex}"
+        try:
+            self.diff_loaded.emit(path, text)
+        except RuntimeError:
+            # Dialog closed while loading
+            pass
+
+    @pyqtSlot(str, str)
+    def show_diff(self, path: str, text: str):
+        current = self.file_list.currentItem()
+        if current is not None and current.data(Qt.ItemDataRole.UserRole)[1] == path:
+            self.diff_view.setPlainText(text)
+
 class Worker(QRunnable):
     WARNING = pyqtSignal(str)
 
@@ -277,9 +908,491 @@ class Worker(QRunnable):
     def run(self):
         self.fn(*self.args, **self.kwargs)
 
+class SshConnections():
+    """One shared SSH connection per remote host, using OpenSSH ControlMaster.
+    Git is pointed at it with GIT_SSH_COMMAND so every pull and fetch to the
+    same host after the first skips the SSH handshake.
+    Hosts are (destination, port, ssh command), the ssh command the repo would
+    use anyway is kept and the ControlMaster options are added to it."""
+    CONTROL_PERSIST = 60
+    MAX_SESSIONS = 8  # Stay below sshd MaxSessions (default 10)
+
+    def __init__(self) -> None:
+        self.enabled = sys.platform != 'win32'
+        # Unix socket paths are limited to 104 bytes on macOS, TMPDIR there is too long
+        self._control_dir = tempfile.mkdtemp(prefix='gg-', dir='/tmp' if os.path.isdir('/tmp') else None)
+        self._masters = {}
+        self._sessions = {}
+        self._timings = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @staticmethod
+    def ssh_command(repo: Repo) -> str:
+        """Command git would use for SSH in repo, in git's order of precedence"""
+        if os.environ.get('GIT_SSH_COMMAND'):
+            return os.environ['GIT_SSH_COMMAND']
+        if os.environ.get('GIT_SSH'):
+            return shlex.quote(os.environ['GIT_SSH'])
+        # Read config files directly, no git process per repo
+        return str(repo.config_reader().get_value('core', 'sshCommand', 'ssh'))
+
+    @staticmethod
+    def remote_host(url: Union[str, None], ssh_command: str = 'ssh') -> Union[tuple, None]:
+        """(destination, port, ssh command) of an SSH remote url. None for local, file:// and http remotes"""
+        if url is None:
+            return None
+        if url.startswith('ssh://') or url.startswith('git+ssh://'):
+            parsed = urlparse(url)
+            destination = f"{parsed.username}@{parsed.hostname}" if parsed.username else parsed.hostname
+            return destination, parsed.port, ssh_command
+        if '://' in url:
+            return None
+        # scp like syntax, user@host:path. Single letter is a Windows drive.
+        match = re.match(r'^([^/:]{2,}):', url)
+        if match:
+            return match.group(1), None, ssh_command
+        return None
+
+    def _options(self, ssh_command: str) -> list:
+        # Separate masters for different ssh commands, they may use different keys
+        control_path = os.path.join(self._control_dir, f"{zlib.crc32(ssh_command.encode()) & 0xffff:04x}%C")
+        return ['-o', 'ControlMaster=auto', '-o', f'ControlPath={control_path}',
+                '-o', f'ControlPersist={self.CONTROL_PERSIST}']
+
+    def _command(self, host: tuple, *args: str) -> list:
+        destination, port, ssh_command = host
+        port_option = ['-p', str(port)] if port else []
+        return shlex.split(ssh_command) + list(args) + self._options(ssh_command) + port_option + [destination]
+
+    def environment(self, host: Union[tuple, None]) -> dict:
+        """Environment for git commands to host"""
+        if host is None or not self.enabled:
+            return {}
+        ssh_command = host[2]
+        return {'GIT_SSH_COMMAND': ' '.join([ssh_command] + [shlex.quote(option) for option in self._options(ssh_command)])}
+
+    def connect(self, host: Union[tuple, None]) -> None:
+        """Open master connection to host, timed as handshake"""
+        if host is None or not self.enabled:
+            return
+        destination = host[0]
+        check = subprocess.run(self._command(host, '-O', 'check'), capture_output=True)
+        if check.returncode == 0:
+            # Master still alive from an earlier pull
+            return
+        command = self._command(host, '-o', 'BatchMode=yes', '-N', '-f')
+        start = perf_counter()
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as ex:
+            print(f"ssh {destination}: {ex}")
+            return
+        if result.returncode != 0:
+            print(f"ssh {destination}: {result.stderr.strip()}")
+            return
+        with self._lock:
+            self._masters[host] = True
+            self._timings.setdefault(host, {'handshake': 0.0, 'transfer': 0.0, 'repos': 0})
+            self._timings[host]['handshake'] += perf_counter() - start
+
+    def session(self, host: Union[tuple, None]) -> threading.Semaphore:
+        """Limits concurrent git commands sharing one connection"""
+        with self._lock:
+            return self._sessions.setdefault(host, threading.Semaphore(self.MAX_SESSIONS))
+
+    def record_transfer(self, host: Union[tuple, None], seconds: float):
+        with self._lock:
+            timing = self._timings.setdefault(host, {'handshake': 0.0, 'transfer': 0.0, 'repos': 0})
+            timing['transfer'] += seconds
+            timing['repos'] += 1
+
+    def report(self) -> list:
+        """Timings since last report, one line per host"""
+        with self._lock:
+            timings, self._timings = self._timings, {}
+        lines = []
+        for host, timing in timings.items():
+            name = "local" if host is None else host[0]
+            lines.append(f"{name}: handshake {timing['handshake']:.1f}s, "
+                         f"transfer {timing['transfer']:.1f}s for {timing['repos']} repos")
+        return lines
+
+    def close(self):
+        """Stop master connections"""
+        for host in list(self._masters):
+            subprocess.run(self._command(host, '-O', 'exit'), capture_output=True)
+        self._masters = {}
+        shutil.rmtree(self._control_dir, ignore_errors=True)
+
+
+class MemoryTracker():
+    """Samples process memory and object counts over time"""
+    SAMPLE_INTERVAL = 5000  # ms
+    MAX_SAMPLES = 1000
+
+    def __init__(self, sources) -> None:
+        """sources returns a dict of counts per subsystem"""
+        self._sources = sources
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+
+    @staticmethod
+    def rss() -> Union[int, None]:
+        """Current resident set size in bytes, None where /proc is missing"""
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def open_fds() -> Union[int, None]:
+        for fd_dir in ['/proc/self/fd', '/dev/fd']:
+            if os.path.isdir(fd_dir):
+                return len(os.listdir(fd_dir))
+        return None
+
+    @staticmethod
+    def live_repos() -> int:
+        return sum(1 for obj in gc.get_objects() if isinstance(obj, Repo))
+
+    def sample(self) -> dict:
+        rss = self.rss()
+        sample = {'time': datetime.now().strftime('%H:%M:%S'),
+                  'rss MB': round(rss / 2**20, 1) if rss else None,
+                  'open fds': self.open_fds(),
+                  'live Repo': self.live_repos()}
+        sample.update(self._sources())
+        self.samples.append(sample)
+        return sample
+
+    @staticmethod
+    def format(sample: dict) -> str:
+        return ", ".join(f"{key}: {value}" for key, value in sample.items())
+
+    def summary(self) -> list:
+        """Growth between first and last sample"""
+        if len(self.samples) < 2:
+            return [self.format(sample) for sample in self.samples]
+        first, last = self.samples[0], self.samples[-1]
+        lines = [f"{len(self.samples)} samples {first['time']} - {last['time']}"]
+        for key, value in last.items():
+            if isinstance(value, (int, float)) and isinstance(first.get(key), (int, float)):
+                lines.append(f"{key}: {first[key]} -> {value} ({value - first[key]:+g})")
+        if last.get('rss MB') and last.get('repositories'):
+            lines.append(f"rss MB per repository: {last['rss MB'] / last['repositories']:.2f}")
+        return lines
+
+
+class DiagnosticsDialog(QDialog):
+
+    def __init__(self, parent: QWidget | None, tracker: MemoryTracker) -> None:
+
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.resize(900, 400)
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+        self._tracker = tracker
+
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        sample_button = QPushButton("Sample")
+        sample_button.clicked.connect(self.sample)
+        self.layout.addWidget(sample_button)
+        self.sample()
+
+    @pyqtSlot()
+    def sample(self):
+        self._tracker.sample()
+        samples = list(self._tracker.samples)
+        keys = list(samples[-1].keys())
+        self.table.setColumnCount(len(keys))
+        self.table.setHorizontalHeaderLabels(keys)
+        self.table.setRowCount(len(samples))
+        for row, sample in enumerate(samples):
+            for column, key in enumerate(keys):
+                self.table.setItem(row, column, QTableWidgetItem(f"{sample.get(key, '')}"))
+        self.table.resizeColumnsToContents()
+        self.table.scrollToBottom()
+
+
+class StatusRequestHandler(socketserver.StreamRequestHandler):
+    """One client connection, requests are JSON lines like {"cmd": "list"}.
+    Replies and pushes are queued and written by a thread of their own, so a
+    client that stops reading only holds up itself."""
+    MAX_QUEUED = 100
+
+    def setup(self):
+        super().setup()
+        self._outbox = queue.Queue(maxsize=self.MAX_QUEUED)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def _write(self):
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            try:
+                self.wfile.write(json.dumps(message).encode() + b'\n')
+                self.wfile.flush()
+            except (OSError, ValueError):
+                return
+
+    def send(self, message: dict) -> bool:
+        """Queue message, False if the client is too far behind"""
+        try:
+            self._outbox.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def drop(self):
+        """Disconnect a client that does not keep up"""
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def finish(self):
+        try:
+            self._outbox.put_nowait(None)
+        except queue.Full:
+            self.drop()
+        self._writer.join(timeout=5)
+        super().finish()
+
+    def handle(self):
+        daemon: StatusDaemon = self.server.status_daemon
+        try:
+            for line in self.rfile:
+                line = line.decode(errors='replace').strip()
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                cmd = request.get('cmd') if isinstance(request, dict) else None
+                if cmd == 'subscribe':
+                    daemon.subscribe(self)
+                elif cmd == 'refresh':
+                    daemon.refresh()
+                elif cmd == 'reload':
+                    daemon.load()
+                    daemon.refresh()
+                elif cmd != 'list':
+                    self.send({'event': 'error', 'error': f"Unknown request: {line}"})
+                    continue
+                if not self.send({'event': 'list', 'records': daemon.records()}):
+                    self.drop()
+        finally:
+            daemon.unsubscribe(self)
+
+
+class StatusDaemon():
+    """Owns repo handles and status records of the configured repositories.
+    Serves them on a Unix socket as JSON lines, subscribers get changed
+    records pushed as {"event": "status", "record": ...}."""
+    POLL_INTERVAL = 5.0
+
+    def __init__(self, socket_path: str = SOCKET_PATH) -> None:
+        self.socket_path = socket_path
+        self._repositories = {}
+        self._repos = {}
+        self._records = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        # Poll thread and client requests refresh, one at a time
+        self._refresh_lock = threading.Lock()
+
+    def load(self):
+        """(Re)read configured repositories from settings"""
+        with self._refresh_lock:
+            self._load()
+
+    def _load(self):
+        settings = QSettings("GitGui", "GitGui")
+        settings.sync()
+        repositories: dict = json.loads(settings.value('repositories', '{}'))
+        for name, value in repositories.items():
+            if name in self._repos or not os.path.exists(value.get('path', '')):
+                continue
+            try:
+                self._repos[name] = Repo(value.get('path'))
+            except Exception as e:
+                print(f"{value.get('path')}: {e}")
+        for name in set(self._repos) - set(repositories):
+            self._repos.pop(name)
+            self._records.pop(name, None)
+        self._repositories = repositories
+
+    def records(self) -> list:
+        return list(self._records.values())
+
+    def refresh(self):
+        """Read status of all repos and push the changed ones"""
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        for name, repo in list(self._repos.items()):
+            policy = StatusPolicy.from_json(self._repositories.get(name, {}).get('status_policy'))
+            try:
+                record = dict(policy.read(repo), name=name)
+            except GitCommandError as ex:
+                record = dict(self._records.get(name, {'dirty': False, 'changes': [], 'behind': 0,
+                                                       'branch': None, 'cost': 0.0}),
+                              name=name, error=f"{ex}")
+            record['changes'] = [list(change) for change in record['changes']]
+            previous = self._records.get(name)
+            self._records[name] = record
+            if previous is None or dict(previous, cost=0) != dict(record, cost=0):
+                self.push({'event': 'status', 'record': record})
+
+    def push(self, message: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        handler: StatusRequestHandler
+        for handler in subscribers:
+            if not handler.send(message):
+                print("Dropping status subscriber that does not keep up")
+                self.unsubscribe(handler)
+                handler.drop()
+
+    def subscribe(self, handler: StatusRequestHandler):
+        with self._lock:
+            self._subscribers.append(handler)
+
+    def unsubscribe(self, handler: StatusRequestHandler):
+        with self._lock:
+            if handler in self._subscribers:
+                self._subscribers.remove(handler)
+
+    def _poll(self):
+        while True:
+            self.refresh()
+            sleep(self.POLL_INTERVAL)
+
+    def serve_forever(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            print("Status daemon needs Unix sockets")
+            return
+        socket_dir = os.path.dirname(self.socket_path)
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        if os.stat(socket_dir).st_uid != os.getuid():
+            print(f"Status daemon: {socket_dir} is owned by another user")
+            return
+        if DaemonClient(self.socket_path).query('list') is not None:
+            print(f"Status daemon already running on {self.socket_path}")
+            return
+        if os.path.exists(self.socket_path):
+            # Left behind by a daemon that did not exit cleanly
+            os.unlink(self.socket_path)
+
+        self.load()
+        self.refresh()
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, StatusRequestHandler)
+        os.chmod(self.socket_path, 0o600)
+        server.daemon_threads = True
+        server.status_daemon = self
+        threading.Thread(target=self._poll, daemon=True).start()
+        print(f"Status daemon serving {len(self._repos)} repositories on {self.socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.unlink(self.socket_path)
+
+
+class DaemonClient(QObject):
+    """Connection to a running StatusDaemon"""
+    status_changed = pyqtSignal(dict)
+
+    def __init__(self, socket_path: str = SOCKET_PATH) -> None:
+        super().__init__()
+        self.socket_path = socket_path
+        self._socket = None
+
+    @property
+    def connected(self) -> bool:
+        return self._socket is not None
+
+    def _connect(self) -> Union[socket.socket, None]:
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(self.socket_path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            return None
+        return sock
+
+    def query(self, cmd: str) -> Union[dict, None]:
+        """Send one request on a new connection and return the reply.
+        None if no daemon is running."""
+        sock = self._connect()
+        if sock is None:
+            return None
+        with sock, sock.makefile('rwb') as stream:
+            stream.write(json.dumps({'cmd': cmd}).encode() + b'\n')
+            stream.flush()
+            line = stream.readline()
+        return json.loads(line) if line else None
+
+    def subscribe(self) -> bool:
+        """Get all records and then every change as status_changed"""
+        self._socket = self._connect()
+        if self._socket is None:
+            return False
+        self.send('subscribe')
+        threading.Thread(target=self._read, daemon=True).start()
+        return True
+
+    def send(self, cmd: str):
+        if self._socket is None:
+            return
+        try:
+            self._socket.sendall(json.dumps({'cmd': cmd}).encode() + b'\n')
+        except OSError as ex:
+            print(f"Status daemon: {ex}")
+
+    def _read(self):
+        sock = self._socket
+        try:
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        print(f"Status daemon sent malformed line: {line[:80]}")
+                        continue
+                    if not isinstance(message, dict):
+                        continue
+                    if message.get('event') == 'list':
+                        for record in message.get('records', []):
+                            self.status_changed.emit(record)
+                    elif message.get('event') == 'status':
+                        self.status_changed.emit(message['record'])
+        except OSError as ex:
+            print(f"Status daemon: {ex}")
+        finally:
+            # Status is read locally again from the next refresh
+            print("Status daemon disconnected")
+            self._socket = None
+            sock.close()
+
+
 class MainWindow(QMainWindow):
+    STATUS_BUDGET = 0.5  # Seconds the status read of one repo may take
+    status_message = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, memory_report: bool = False):
         super().__init__()
         self.settings = QSettings("GitGui", "GitGui")
         self._repositories: dict = json.loads(self.settings.value('repositories', '{}'))
@@ -302,8 +1415,22 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(self.window_title)
 
         self.thread_pool = QThreadPool()
+        self._timeline_cache = Cache(20)
+        self._diff_loader = DiffLoader()
+        self._ssh = SshConnections()
+        self._memory = MemoryTracker(self.memory_sources)
+        self._repo_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogDetailedView)
+        self._update_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_BrowserReload)
+        self._daemon_records = {}
+        self._repo_items = {}  # Repo name -> RepoItem rows showing it, one per group
+        self._daemon_client = DaemonClient()
+        self._daemon_client.status_changed.connect(self.apply_daemon_status)
+        if self._daemon_client.subscribe():
+            print(f"Using status daemon on {self._daemon_client.socket_path}")
         
         self.status_bar = self.statusBar()
+        # Status refresh runs on the thread pool, the status bar is updated on the GUI thread
+        self.status_message.connect(self.status_bar.showMessage)
         self.setupMenuBar()
         cWidget = QWidget()
         centralLayout = QHBoxLayout()
@@ -318,6 +1445,12 @@ class MainWindow(QMainWindow):
         # self._dirty_timer.timeout.connect(self.update_dirty_status)
         # self._dirty_timer.start(5000)
         self._blinking_repo_items = []
+
+        if memory_report:
+            self._memory_timer = QTimer(self)
+            self._memory_timer.timeout.connect(self.print_memory_sample)
+            self._memory_timer.start(MemoryTracker.SAMPLE_INTERVAL)
+            atexit.register(lambda: print("\n".join(self._memory.summary())))
  
     def focusInEvent(self, e):
         self._dirty_timer.stop()
@@ -408,12 +1541,20 @@ class MainWindow(QMainWindow):
             menu = QMenu()
             action:QAction = menu.addAction("Pull")
             action.triggered.connect(lambda checked: self.do_pull(items))
+            action:QAction = menu.addAction("Fetch")
+            action.triggered.connect(lambda checked: self.do_pull(items, fetch=True))
             action:QAction = menu.addAction("Set to branch")
             action.triggered.connect(lambda checked: self.set_to_branch(items))
             menu.addSeparator()
+            action:QAction = menu.addAction("Show changes")
+            action.triggered.connect(lambda checked: self.show_changes(item))
+            menu.addSeparator()
             action:QAction = menu.addAction("Create branch")
             action.triggered.connect(lambda checked: self.create_branch(items))
             menu.addSeparator()
+            action:QAction = menu.addAction("Status policy")
+            action.triggered.connect(lambda checked: self.set_status_policy(items))
+            menu.addSeparator()
             action:QAction = menu.addAction("Add to group")
             action.triggered.connect(lambda checked: self.add_to_group(items))
             menu.addSeparator()
@@ -435,10 +1576,16 @@ class MainWindow(QMainWindow):
             menu = QMenu()
             action:QAction = menu.addAction("Pull")
             action.triggered.connect(lambda checked: self.do_pull(items))
+            action:QAction = menu.addAction("Fetch")
+            action.triggered.connect(lambda checked: self.do_pull(items, fetch=True))
             action:QAction = menu.addAction("Set to branch")
             action.triggered.connect(lambda checked: self.set_to_branch(items))
             action:QAction = menu.addAction("Create branch")
             action.triggered.connect(lambda checked: self.create_branch(items))
+            action:QAction = menu.addAction("Status policy")
+            action.triggered.connect(lambda checked: self.set_status_policy(items))
+            action:QAction = menu.addAction("Timeline")
+            action.triggered.connect(lambda checked: self.show_timeline(item))
             menu.addSeparator()
             action:QAction = menu.addAction("Rename group")
             action.triggered.connect(lambda checked: self.rename_group(item))
@@ -537,8 +1684,8 @@ class MainWindow(QMainWindow):
                     child: RepoItem = item.child(row, 0)
                     self._create_branch(child, branch_name)
 
-    def do_pull(self, items):
-        """Pull on all selected repos"""
+    def do_pull(self, items, fetch: bool = False):
+        """Pull on all selected repos. Repos on the same SSH host share one connection."""
 
         filtered_items = []
         for item in items:
@@ -549,15 +1696,103 @@ class MainWindow(QMainWindow):
                 for row in range(item.rowCount()):
                     filtered_items.append(item.child(row, 0))
 
+        hosts = {}
         item: RepoItem
         for item in set(filtered_items):
-            it = Worker(item.pull)
+            host = SshConnections.remote_host(item.remote_url, SshConnections.ssh_command(item.repo))
+            hosts.setdefault(host, []).append(item)
+
+        for host in hosts:
+            it = Worker(self._ssh.connect, host)
             self.thread_pool.start(it)
         self.thread_pool.waitForDone()
+        for host, host_items in hosts.items():
+            for item in host_items:
+                it = Worker(self._pull_item, item, host, fetch)
+                self.thread_pool.start(it)
+        self.thread_pool.waitForDone()
+
+        report = self._ssh.report()
+        print("\n".join(report))
+        self.status_bar.showMessage("; ".join(report))
+        self.update_repo_status(filtered_items)
         for item in set(filtered_items):
             if item.error_msg:
                 QMessageBox.information(None, f"Git Error: {item.text()}", item.error_msg)
 
+    def update_repo_status(self, items: list):
+        """Read status of the repos of items once and show it, with their
+        errors, in every group the repos are in"""
+        item: RepoItem
+        for item in {item.text(): item for item in items}.values():
+            item.update_dirty_status()
+            for shown_item in self._repo_items.get(item.text(), []):
+                if shown_item is not item:
+                    shown_item.error_msg = item.error_msg
+                    shown_item.apply_status(item.status)
+
+    def _pull_item(self, item: RepoItem, host: Union[tuple, None], fetch: bool):
+        with self._ssh.session(host):
+            env = self._ssh.environment(host)
+            seconds = item.fetch(env) if fetch else item.pull(env)
+        self._ssh.record_transfer(host, seconds)
+
+    def set_status_policy(self, items):
+        """Set status policy on selected repos and on all repos in selected groups"""
+        repo_items = []
+        for item in items:
+            if type(item) is RepoItem:
+                repo_items.append(item)
+            elif type(item) is GroupItem:
+                for row in range(item.rowCount()):
+                    repo_items.append(item.child(row, 0))
+        if not repo_items:
+            return
+        # Same repo is shown once per group
+        repo_items = list({item.text(): item for item in repo_items}.values())
+
+        spd = StatusPolicyDialog(self, repo_items[0].policy, [item.git_status_cache() for item in repo_items])
+        if not spd.exec():
+            # Cancel selected
+            return
+
+        untracked_cache, fsmonitor = spd.git_cache
+        for item in repo_items:
+            self._repositories[item.text()]['status_policy'] = spd.policy.to_json()
+            try:
+                item.set_git_status_cache(untracked_cache, fsmonitor)
+            except Exception as ex:
+                print(f'{item.text()}: {ex}')
+            for shown_item in self._repo_items.get(item.text(), []):
+                shown_item.policy = spd.policy
+        self.save_repositories_to_settings()
+        self.update_dirty_status()
+
+    def show_changes(self, item: RepoItem):
+        """Show changed files of repo, diffs are loaded when selected"""
+        dialog = ChangesDialog(self, item, self._diff_loader, self.thread_pool)
+        dialog.show()
+
+    def show_timeline(self, item: GroupItem):
+        """Show commits of all repos in group, newest first"""
+        days, ok = QInputDialog.getInt(self, 'Timeline', 'Days of history:', 1, 1, 3650)
+        if not ok:
+            return
+        repos = {}
+        for row in range(item.rowCount()):
+            child: RepoItem = item.child(row, 0)
+            repos[child.text()] = child.repo
+        since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+
+        key = CommitTimeline.key(repos, since)
+        timeline = self._timeline_cache.get(key)
+        if timeline is None:
+            timeline = CommitTimeline(repos, since, key[1])
+            self._timeline_cache.put(key, timeline)
+        model = TimelineModel(timeline, self.thread_pool)
+        dialog = TimelineDialog(self, f"Timeline: {item.text()}", model)
+        dialog.show()
+
     @pyqtSlot()
     def do_blinking(self):
         to_remove = []
@@ -613,13 +1848,17 @@ class MainWindow(QMainWindow):
         if sbd.exec():
             branch_name: str = sbd.branch_combo.currentText()
             force: bool = sbd.force.isChecked()
+            changed_items = []
             for item in items:
                 if type(item) is RepoItem:
                     item.set_branch(branch_name, create_if_not_existing=force)
+                    changed_items.append(item)
                 elif type(item) is GroupItem:
                     for row in range(item.rowCount()):
                         child: RepoItem = item.child(row, 0)
                         child.set_branch(branch_name, create_if_not_existing=force)
+                        changed_items.append(child)
+            self.update_repo_status(changed_items)
             # self.update_repository_data()
         else:
             # Cancel selected
@@ -673,13 +1912,43 @@ class MainWindow(QMainWindow):
         addGroupAction.triggered.connect(self.createGroup)
         fileMenu.addAction(addGroupAction)
 
+        diagnosticsAction = QAction("&Diagnostics", self)
+        diagnosticsAction.setStatusTip('Memory and object counts')
+        diagnosticsAction.triggered.connect(self.diagnostics_dialog)
+
         fileMenu = mainMenu.addMenu('&About')
         fileMenu.addAction(infoAction)
+        fileMenu.addAction(diagnosticsAction)
 
     @pyqtSlot()
     def info_dialog(self):
         box = QMessageBox.information(self, "About", "Disclaimer!!\nUse at your own peril!")
 
+    @pyqtSlot()
+    def diagnostics_dialog(self):
+        dialog = DiagnosticsDialog(self, self._memory)
+        dialog.show()
+
+    @pyqtSlot()
+    def print_memory_sample(self):
+        print(MemoryTracker.format(self._memory.sample()))
+
+    def memory_sources(self) -> dict:
+        """Counts per subsystem for MemoryTracker"""
+        root = self.repositoryTreeModel.invisibleRootItem()
+        tree_items = 0
+        for row in range(root.rowCount()):
+            group: GroupItem = root.child(row, 0)
+            tree_items += len(group.items) if type(group) is GroupItem else 1
+            tree_items += group.rowCount() * group.columnCount()
+        return {'repositories': len(self._repositories),
+                'tree items': tree_items,
+                'timeline rows': sum(dialog.model.rowCount() for dialog in self.findChildren(TimelineDialog)),
+                'changes rows': sum(dialog.file_list.count() for dialog in self.findChildren(ChangesDialog)),
+                'timeline cache': len(self._timeline_cache),
+                'diff cache': len(self._diff_loader.cache),
+                'daemon records': len(self._daemon_records)}
+
     @pyqtSlot()
     def createGroup(self):
         text, ok = QInputDialog.getText(self, 'Create group', 'Group name:')
@@ -723,17 +1992,21 @@ class MainWindow(QMainWindow):
         value: dict
         for key, value in self._repositories.items():
             save_json[key] = {'path': value.get('path')}
+            if 'status_policy' in value:
+                save_json[key]['status_policy'] = value.get('status_policy')
         self.settings.setValue('repositories', json.dumps(save_json))
+        self.settings.sync()
+        self._daemon_client.send('reload')
 
     def save_groups_to_settings(self):
         """Save group data to JSON"""
         self.settings.setValue('groups', json.dumps(self._groups))
 
     def add_to_tree(self, name: str, repo: Repo, group: GroupItem):
-        repo_item = RepoItem(name, repo, 
-                             self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogDetailedView), 
-                             self.style().standardIcon(QStyle.StandardPixmap.SP_BrowserReload))
+        policy = StatusPolicy.from_json(self._repositories.get(name, {}).get('status_policy'))
+        repo_item = RepoItem(name, repo, self._repo_icon, self._update_icon, policy)
         group.appendRow(repo_item.items)
+        self._repo_items.setdefault(name, []).append(repo_item)
         self.repositoryTree.setSortingEnabled(True)
         # self.repositoryTree.expandAll()
         self.repositoryTree.sortByColumn(0, Qt.SortOrder.AscendingOrder)
@@ -744,6 +2017,7 @@ class MainWindow(QMainWindow):
         self.repositoryTree.collapsed.disconnect(self.adjustTreeColumns)
 
         self.repositoryTreeModel.setRowCount(0)
+        self._repo_items = {}
 
         self._group_all = GroupItem('All')
         it = Worker(self.update_repository_worker)
@@ -766,7 +2040,7 @@ class MainWindow(QMainWindow):
 
         for group, value in self._groups.items():
             group_item = GroupItem(group)
-            self.repositoryTreeModel.invisibleRootItem().appendRow([group_item])
+            self.repositoryTreeModel.invisibleRootItem().appendRow(group_item.items)
             for val in value:
                 data = self._repositories.get(val)
                 if data is not None and 'repo' in data:
@@ -776,7 +2050,7 @@ class MainWindow(QMainWindow):
                 g_index = self.repositoryTreeModel.indexFromItem(group_item)
                 self.repositoryTree.expand(g_index)
 
-        self.repositoryTreeModel.invisibleRootItem().appendRow([self._group_all])
+        self.repositoryTreeModel.invisibleRootItem().appendRow(self._group_all.items)
         if 'All' in self._groups_expanded:
             g_index = self.repositoryTreeModel.indexFromItem(self._group_all)
             self.repositoryTree.expand(g_index)
@@ -789,15 +2063,67 @@ class MainWindow(QMainWindow):
     @pyqtSlot()
     def update_dirty_status(self):
         """Uppdate background color if dirty"""
-        child: RepoItem
-        for group_row in range(self.repositoryTreeModel.invisibleRootItem().rowCount()):
-            group_item = self.repositoryTreeModel.invisibleRootItem().child(group_row)
-            for child_row in range(group_item.rowCount()):
-                child = group_item.child(child_row)
-                child.update_dirty_status()
-        
+        if self._daemon_client.connected:
+            for name, record in list(self._daemon_records.items()):
+                for item in self._repo_items.get(name, []):
+                    item.apply_status(record)
+            return
+
+        # Read each repo once and show the record in every group it is in
+        repo_items: list
+        read_items = []
+        for repo_items in list(self._repo_items.values()):
+            repo_items[0].update_dirty_status()
+            for item in repo_items[1:]:
+                item.apply_status(repo_items[0].status)
+            read_items.append(repo_items[0])
+        self.check_status_budget(read_items)
+
+    @pyqtSlot(dict)
+    def apply_daemon_status(self, record: dict):
+        """Status record pushed from status daemon"""
+        self._daemon_records[record['name']] = record
+        for item in self._repo_items.get(record['name'], []):
+            item.apply_status(record)
+
+    def check_status_budget(self, repo_items: list):
+        """Suggest a cheaper status policy for every repo
+        whose status read does not fit in STATUS_BUDGET"""
+        over_budget = [item for item in repo_items if item.status_cost > self.STATUS_BUDGET]
+        if not over_budget:
+            return
+        messages = []
+        item: RepoItem
+        for item in sorted(over_budget, key=lambda item: item.status_cost, reverse=True):
+            message = f"{item.text()} {item.status_cost:.1f}s"
+            suggestion = item.policy.cheaper()
+            if suggestion:
+                message += f", suggested status policy: {suggestion.describe()}"
+            print(f"Status over budget: {message}")
+            messages.append(message)
+        self.status_message.emit(f"{len(over_budget)} repos over status budget: " + "; ".join(messages))
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    main_window = MainWindow()
+    parser = argparse.ArgumentParser(description="A graphical tool to manage branches on multiple git repositories")
+    parser.add_argument('--daemon', action='store_true',
+                        help=f"serve repository status on {SOCKET_PATH}")
+    parser.add_argument('--query', choices=['list', 'refresh', 'reload'],
+                        help="print reply of a running status daemon as JSON")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="print memory and object counts every few seconds and a summary at exit")
+    args, qt_args = parser.parse_known_args()
+    if args.daemon:
+        StatusDaemon().serve_forever()
+        sys.exit(0)
+    if args.query:
+        reply = DaemonClient().query(args.query)
+        if reply is None:
+            print(f"No status daemon running on {SOCKET_PATH}")
+            sys.exit(1)
+        print(json.dumps(reply, indent=2))
+        sys.exit(0)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    main_window = MainWindow(memory_report=args.memory_report)
     main_window.show()
     sys.exit(app.exec())